@@ -3,8 +3,10 @@ import time
 import json
 
 from logger import logger
-from constantes import CONFIG_FILE, DEFAULT_SETTINGS, SOUNDS, FILTER_SETTINGS
+from constantes import CONFIG_FILE, DEFAULT_SETTINGS, SOUNDS, FILTER_SETTINGS, OCR_TIERS, CAPTURE_SETTINGS
 from player import Player
+from governor import Governor
+from profiler import CaptureProfiler
 import reader
 
 class Settings:
@@ -120,10 +122,13 @@ class App():
     - define association between GPIO and callbacks
     - handle capture to speech process
     """
-    def __init__(self, keyGPIO):
+    def __init__(self, keyGPIO, player=None):
         self.basename = '/tmp/scan' 
-        self.player = Player()
+        self.player = player if player is not None else Player()
         self.settings = Settings(self.player)
+        self.governor = Governor()
+        self.profiler = CaptureProfiler(on_saved=lambda: self.acknowledge('scan'),
+                                        on_error=lambda: self.acknowledge('erreur'))
 
         # Must be coherent with constantes.CB
         self.callbacks=[self.shutdown,
@@ -135,7 +140,8 @@ class App():
                         self.settings.speed_inc,
                         self.cancel_cb,
                         self.player.backward,
-                        self.player.forward
+                        self.player.forward,
+                        self.profile_next_cb
                         ]
 
         self.keyGPIO = keyGPIO
@@ -153,6 +159,18 @@ class App():
     def start(self):
         self.keyGPIO.start()
         self.keyGPIO.links(self.callbacks)
+        self.keyGPIO.idle_period = self.governor.settings['idle_refresh']
+        self.keyGPIO.idle_callback = self.refresh_governor
+        self.refresh_governor()
+
+    def refresh_governor(self):
+        """
+        Read the device condition, adapt the keypad polling
+        and return the governor decision
+        """
+        decision = self.governor.decide()
+        self.keyGPIO.poll_interval = decision['poll']
+        return decision
         
     def wait(self):
         """Attend les entrées clavier sans bloquer"""
@@ -172,22 +190,61 @@ class App():
         #self.player.play(self.basename)
         self.player.pause()
 
+    def profile_next_cb(self):
+        """
+        Profile the next capture, acknowledged once the profile is saved
+        """
+        self.profiler.arm()
+
+    def acknowledge(self, sound):
+        """
+        Play a short sound before the text is read
+        """
+        self.player.play(SOUNDS + sound)
+        time.sleep(1)
+
     def capture(self):
+        """
+        Capture to speech, profiled if requested (see profiler.CaptureProfiler)
+        """
+        sound = self.profiler.run(self._capture)
+
+        # 4. Start audio player
+        self.player.play(sound)
+
+    def _capture(self):
         """
         Main process from image capture to speech:
         1. Capture an image
         2. OCR to text
         3. Text to speech
-        4. Start audio player
+        Return the sound to play: the text read, or the error sound
         """
         logger.info('app.capture')
+        start = time.perf_counter()
+
+        # Adapt OCR workload to temperature, throttling and battery
+        decision = self.refresh_governor()
+        self.governor.apply(decision)
+        b_filter = FILTER_SETTINGS['filter'] and decision['tier'] == 'full'
+        max_tier = None
+        if OCR_TIERS['enabled']:
+            # tiered OCR escalates to filtering only when needed
+            b_filter = False
+            max_tier = OCR_TIERS['max_tier'] if decision['tier'] == 'full' else 0
 
         # 1. Capture an image
 
         # Take photo
         self.settings.set_volume_play()
         self.player.play(SOUNDS + "camera-shutter")
-        reader.snapshot(self.basename)
+        image = None
+        if CAPTURE_SETTINGS['mode'] == 'gray':
+            # luma plane at OCR resolution, no JPEG nor color conversion
+            image = reader.snapshot_gray(self.basename, CAPTURE_SETTINGS['width'],
+                                         CAPTURE_SETTINGS['height'])
+        else:
+            reader.snapshot(self.basename)
         logger.info('app.capture.snapshot')
 
         # OCR to text
@@ -199,7 +256,9 @@ class App():
         self.player.play(SOUNDS + "orange", extension="mp3")
 
         # 2. OCR to text
-        reader.ocr_to_text(self.basename, FILTER_SETTINGS['rotation'], FILTER_SETTINGS['filter'])
+        reader.ocr_to_text(self.basename, FILTER_SETTINGS['rotation'], b_filter,
+                           b_deskew=FILTER_SETTINGS['deskew'], max_tier=max_tier,
+                           image=image)
 
         # stop song
         self.player.stop()
@@ -212,16 +271,16 @@ class App():
             # 3. Text to speech
             reader.text_to_sound(self.basename)
 
-            # 4. Start audio player
             if os.stat("/tmp/scan.txt").st_size != 0:
-                self.player.play(self.basename)
+                sound = self.basename
             else:
                 raise Exception('audio file empty')
         except:
             logger.error("Cannot read")
-            self.player.play(SOUNDS + "erreur")
+            sound = SOUNDS + "erreur"
 
-        return
+        logger.info('app.capture %s: %.2f s' % (CAPTURE_SETTINGS['mode'], time.perf_counter() - start))
+        return sound
 
     def cancel_cb(self):
         """
@@ -27,24 +27,10 @@ import time
 from logger import logger
 from app import App
 from constantes import SOUNDS
-from constantes import CB
+from constantes import TAB_KEYBOARD
 from player import Player
 from keypad_GPIO import Key_GPIO
 
-# key map with callback functions
-tab_keyboard= {
-    CB.CAPTURE:'1',
-    CB.PLAY_START_STOP:'4',
-    CB.VOLUME_INC:'3',
-    CB.VOLUME_DEC:'2',
-    CB.SPEED_INC:'6',
-    CB.SPEED_DEC:'5',       
-    CB.FORWARD:'9',
-    CB.BACKWARD:'8',
-    CB.ON_OFF:'0',
-    CB.CANCEL:'7'
-}
-
 # Vérifie si la caméra est détectée par le système
 try:
     result = os.popen("libcamera-hello --list-cameras").read()
@@ -75,7 +61,7 @@ except Exception as e:
 ######
 
 try:
-    app = App(keyGPIO = Key_GPIO(tab_keyboard))
+    app = App(keyGPIO = Key_GPIO(TAB_KEYBOARD))
     
     if erreur_camera == True:
         app.player.play(SOUNDS + 'erreur-camera')
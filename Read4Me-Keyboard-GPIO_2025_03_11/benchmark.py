@@ -0,0 +1,139 @@
+"""
+    Benchmarks of the image pipeline, runnable off the Pi
+
+    Run using:
+    $ python3 benchmark.py [rotation] [capture]
+"""
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+from PIL import Image
+
+from img_filter import rotate_image, warp_rotate_image, estimate_skew, \
+    adaptative_thresholding, toImgOpenCV, toImgPIL
+
+
+def synthetic_page(width=2592, height=4608, lines=40):
+    """
+    Grayscale page of black text lines on white, close to a camera capture
+    """
+    page = np.full((height, width), 255, np.uint8)
+    step = height // (lines + 2)
+    for i in range(1, lines + 1):
+        cv2.putText(page, 'Lorem ipsum dolor sit amet %d consectetur' % i,
+                    (width // 12, i * step), cv2.FONT_HERSHEY_SIMPLEX,
+                    width / 1400.0, 0, max(1, width // 600))
+    return page
+
+
+def timeit(func, *args, repeat=5):
+    """
+    Best time of repeat runs, in ms, and last result
+    """
+    best = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(*args)
+        elapsed = (time.perf_counter() - t0) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def shifted_diff(a, b):
+    """
+    Max pixel difference between two images, allowing a 1 pixel shift
+    (warpAffine rotates around (w // 2, h // 2) and may shift by one pixel)
+    """
+    if a.shape != b.shape:
+        return 'shape %s / %s' % (a.shape[:2], b.shape[:2])
+    a = a.astype(np.int16)
+    return min(int(np.abs(np.roll(a, (dy, dx), axis=(0, 1)) - b)[1:-1, 1:-1].max())
+               for dy in (-1, 0, 1) for dx in (-1, 0, 1))
+
+
+def bench_rotation():
+    """
+    Right angle fast path against the warpAffine rotation, and skew estimation
+    """
+    page = synthetic_page()
+    color = cv2.cvtColor(page, cv2.COLOR_GRAY2BGR)
+    print('rotation, image %dx%d' % (page.shape[1], page.shape[0]))
+    for name, img in (('gray', page), ('color', color)):
+        for angle in (90, 180, 270):
+            t_warp, warped = timeit(warp_rotate_image, img, angle)
+            t_fast, fast = timeit(rotate_image, img, angle)
+            diff = shifted_diff(warped, fast)
+            print('  %-5s %3d°  warpAffine %8.1f ms  fast path %7.1f ms  x%5.1f  max diff %s'
+                  % (name, angle, t_warp, t_fast, t_warp / t_fast, diff))
+
+    print('skew estimation')
+    for skew in (-4.0, -1.5, 0.0, 0.7, 2.5):
+        tilted = warp_rotate_image(page, skew)
+        t_est, found = timeit(estimate_skew, tilted, repeat=3)
+        print('  tilt %+4.1f°  correction %+4.1f°  error %4.1f°  %6.1f ms'
+              % (skew, found, abs(found + skew), t_est))
+
+
+def bench_capture(sensor=(4608, 2592), scaled=(2304, 1296)):
+    """
+    Color JPEG at sensor resolution against the luma plane of a scaled
+    YUV420 frame, from the camera file to the filtered PIL image
+    """
+    page = synthetic_page(sensor[0], sensor[1], lines=25)
+    directory = tempfile.mkdtemp()
+
+    # current path: color JPEG decoded to RGB, channels swapped, then gray
+    jpeg = os.path.join(directory, 'scan.jpg')
+    cv2.imwrite(jpeg, cv2.cvtColor(page, cv2.COLOR_GRAY2BGR))
+
+    def jpeg_path():
+        img = Image.open(jpeg)
+        img.load()
+        img_cv2 = toImgOpenCV(img)
+        binar = adaptative_thresholding(img_cv2, 20)
+        # buffers produced: decoded RGB, OpenCV copy, binarized
+        return toImgPIL(binar), [len(img.tobytes()), img_cv2.nbytes, binar.nbytes]
+
+    # gray path: Y plane of a YUV420 frame, single channel all along
+    (w, h) = scaled
+    yuv = os.path.join(directory, 'scan.yuv')
+    luma = cv2.resize(page, scaled, interpolation=cv2.INTER_AREA)
+    chroma = np.full(w * h // 2, 128, np.uint8)
+    np.concatenate((luma.ravel(), chroma)).tofile(yuv)
+
+    def gray_path():
+        data = np.fromfile(yuv, dtype=np.uint8)
+        stride = len(data) * 2 // (h * 3)
+        y = data[:stride * h].reshape(h, stride)[:, :w]
+        binar = adaptative_thresholding(y, 20)
+        # buffers produced: raw frame (the Y plane is a view on it), binarized
+        return toImgPIL(binar), [data.nbytes, binar.nbytes]
+
+    t_jpeg, (_, buffers_jpeg) = timeit(jpeg_path, repeat=3)
+    t_gray, (_, buffers_gray) = timeit(gray_path, repeat=3)
+    jpeg_bytes = os.stat(jpeg).st_size
+    yuv_bytes = os.stat(yuv).st_size
+    moved_jpeg = jpeg_bytes + sum(buffers_jpeg)
+    moved_gray = yuv_bytes + sum(buffers_gray)
+    print('capture to filtered image')
+    print('  jpeg %dx%d color  file %9d bytes  moved %10d bytes  %7.1f ms'
+          % (sensor[0], sensor[1], jpeg_bytes, moved_jpeg, t_jpeg))
+    print('  gray %dx%d luma   file %9d bytes  moved %10d bytes  %7.1f ms'
+          % (w, h, yuv_bytes, moved_gray, t_gray))
+    for name in (jpeg, yuv):
+        os.remove(name)
+    os.rmdir(directory)
+
+
+BENCHMARKS = {'rotation': bench_rotation,
+              'capture': bench_capture}
+
+if __name__ == '__main__':
+    names = sys.argv[1:] or list(BENCHMARKS)
+    for name in names:
+        BENCHMARKS[name]()
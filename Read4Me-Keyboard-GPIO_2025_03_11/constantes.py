@@ -13,8 +13,34 @@ class CB(Enum):
     BACKWARD=8
     ON_OFF=0
     CANCEL=7
+    PROFILE=10
 
-FILTER_SETTINGS={'rotation':True, 'filter':False}
+# key map with callback functions
+TAB_KEYBOARD = {
+    CB.CAPTURE:'1',
+    CB.PLAY_START_STOP:'4',
+    CB.VOLUME_INC:'3',
+    CB.VOLUME_DEC:'2',
+    CB.SPEED_INC:'6',
+    CB.SPEED_DEC:'5',
+    CB.FORWARD:'9',
+    CB.BACKWARD:'8',
+    CB.ON_OFF:'0',
+    CB.CANCEL:'7',
+    CB.PROFILE:'A'
+}
+
+# Capture mode: 'gray' asks the camera for a scaled YUV420 frame and keeps
+# only the luma (Y) plane, 'jpeg' keeps the full color capture.
+# Width should be a multiple of 64 to avoid padded lines.
+CAPTURE_SETTINGS = {'mode': 'gray', 'width': 2304, 'height': 1296}
+
+FILTER_SETTINGS={'rotation':True, 'deskew':True, 'filter':False}
+
+# Tesseract page segmentation mode: 'auto' lets layout.choose_psm pick it,
+# or a fixed mode (3 full page, 6 block, 7 line, 11 sparse text).
+# compare_psm also runs --psm 3 to log the time saved (debug only, slow).
+OCR_SETTINGS = {'psm': 'auto', 'compare_psm': False}
 
 DEFAULT_SETTINGS = {'volume': 96,
                    'volume_help' : 95,
@@ -28,7 +54,44 @@ except KeyError:
 SOUNDS  = READFORME_PATH+'/sounds/'
 CONFIG_FILE= READFORME_PATH+'/config.json'
 
+# Tiered OCR: light image first, escalate to heavier preprocessing while the
+# mean word confidence or the number of words is below the thresholds.
+# When enabled it replaces FILTER_SETTINGS['filter'].
+OCR_TIERS = {'enabled': True,
+             'names': ['light', 'binarize', 'upscale'],
+             'max_tier': 2,
+             'min_confidence': 70.0,
+             'min_words': 5,
+             # short texts: a single line or a sparse label needs one word
+             'min_words_psm': {7: 1, 11: 1},
+             # fewer words than min_words are kept if read that confidently
+             'confident': 85.0,
+             # upscale tier: images are enlarged to this width (x2 at most),
+             # it is skipped for wider images (sensor resolution)
+             'upscale_width': 3000,
+             'stats_file': READFORME_PATH + '/ocr_stats.jsonl'}
+
 CMD_MIXER = "amixer -q sset Headphone,0 "
 CMD_CAMERA  = 'libcamera-still --rotation 180 -t 500 -o '
+CMD_CAMERA_GRAY = 'libcamera-still --rotation 180 -t 500 --encoding yuv420 --width %d --height %d -o '
 CMD_OCR = 'tesseract -l fra --psm 3'
 CMD_SOUND = "/usr/bin/pico2wave -l fr-FR -w"
+
+# The keypad is scanned, a key is only seen if held during a scan:
+# keep the period under 0.1 s so that a ~150 ms tap is never missed.
+KEYPAD_MAX_POLL = 0.1
+
+# Resource governor: sysfs sources read before each capture.
+# READFORME_SYSFS prefixes every path so a fake sysfs tree can be used off the Pi.
+GOVERNOR_SETTINGS = {'sysfs_root': os.environ.get('READFORME_SYSFS', ''),
+                     'temp_path': '/sys/class/thermal/thermal_zone0/temp',
+                     'throttled_path': '/sys/devices/platform/soc/soc:firmware/get_throttled',
+                     'battery_path': '/sys/class/power_supply/BAT0/capacity',
+                     'battery_status_path': '/sys/class/power_supply/BAT0/status',
+                     'temp_warm': 65.0,     # °C
+                     'temp_hot': 75.0,      # °C
+                     'battery_low': 30,     # %
+                     'battery_critical': 15,  # %
+                     # keypad scan period (s): faster only when nothing is constrained
+                     'poll_interval': {'normal': 0.05, 'warm': KEYPAD_MAX_POLL, 'hot': KEYPAD_MAX_POLL},
+                     'idle_refresh': 60}    # s between decisions while idle
@@ -0,0 +1,114 @@
+import os
+
+from logger import logger
+from constantes import GOVERNOR_SETTINGS
+
+
+class Governor:
+    """
+    Adapt the OCR workload to the device condition
+
+    Read CPU temperature, throttling state and battery level from sysfs
+    and choose:
+    - threads: number of threads tesseract may use (OMP_THREAD_LIMIT)
+    - tier: preprocessing tier, 'full' or 'light' (no extra filtering)
+    - poll: keypad polling interval in seconds
+
+    Every path is prefixed by settings['sysfs_root'], so a fake sysfs tree
+    can stand in for the real one. A missing file is read as None and does
+    not constrain the decision.
+    """
+    def __init__(self, settings=GOVERNOR_SETTINGS):
+        self.settings = settings
+        self.cpus = os.cpu_count() or 1
+
+    def _read(self, key):
+        """
+        Read a sysfs file, return its stripped content or None
+        """
+        path = self.settings['sysfs_root'].rstrip('/') + self.settings[key]
+        try:
+            with open(path, 'r') as f:
+                return f.read().strip()
+        except (OSError, KeyError):
+            return None
+
+    def temperature(self):
+        """
+        CPU temperature in °C (sysfs gives millidegrees)
+        """
+        value = self._read('temp_path')
+        try:
+            return int(value) / 1000.0
+        except (TypeError, ValueError):
+            return None
+
+    def throttled(self):
+        """
+        True if the firmware reports under-voltage, capping or throttling now
+        (bits 0 to 3 of get_throttled)
+        """
+        value = self._read('throttled_path')
+        try:
+            return (int(value, 16) & 0xF) != 0
+        except (TypeError, ValueError):
+            return None
+
+    def battery(self):
+        """
+        Battery level in %, or None if the battery is charging or unknown
+        """
+        status = self._read('battery_status_path')
+        if status is not None and status.lower() in ('charging', 'full'):
+            return None
+        value = self._read('battery_path')
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return None
+
+    def state(self, temp, throttled, battery):
+        """
+        Return the device condition: 'normal', 'warm' or 'hot'
+        """
+        s = self.settings
+        if throttled or (temp is not None and temp >= s['temp_hot']) \
+                or (battery is not None and battery <= s['battery_critical']):
+            return 'hot'
+        if (temp is not None and temp >= s['temp_warm']) \
+                or (battery is not None and battery <= s['battery_low']):
+            return 'warm'
+        return 'normal'
+
+    def decide(self):
+        """
+        Read the sensors and return the decision for the next capture
+        """
+        temp = self.temperature()
+        throttled = self.throttled()
+        battery = self.battery()
+        state = self.state(temp, throttled, battery)
+
+        if state == 'hot':
+            threads = 1
+            tier = 'light'
+        elif state == 'warm':
+            threads = max(1, self.cpus // 2)
+            tier = 'full'
+        else:
+            threads = self.cpus
+            tier = 'full'
+
+        decision = {'state': state,
+                    'threads': threads,
+                    'tier': tier,
+                    'poll': self.settings['poll_interval'][state]}
+        logger.info('governor: temp=%s throttled=%s battery=%s -> %s'
+                    % (temp, throttled, battery, decision))
+        return decision
+
+    def apply(self, decision):
+        """
+        Apply the thread limit to the tesseract child processes
+        """
+        os.environ['OMP_THREAD_LIMIT'] = str(decision['threads'])
@@ -3,17 +3,41 @@ import numpy as np
 from PIL import Image
 
 def toImgOpenCV(imgPIL): # Conver imgPIL to imgOpenCV
+    if imgPIL.mode == 'L':
+        return np.asarray(imgPIL) # grayscale, no channel to swap
     i = np.array(imgPIL) # After mapping from PIL to numpy : [R,G,B,A]
                          # numpy Image Channel system: [B,G,R,A]
     red = i[:,:,0].copy(); i[:,:,0] = i[:,:,2].copy(); i[:,:,2] = red
     return i
 
 def toImgPIL(imgOpenCV): 
+    if len(imgOpenCV.shape) == 2:
+        return Image.fromarray(imgOpenCV) # grayscale, mode L
     return Image.fromarray(cv2.cvtColor(imgOpenCV, cv2.COLOR_BGR2RGB))
 
+# Right angle rotations done with transpose and flip, no interpolation
+# (angle counter-clockwise, as cv2.getRotationMatrix2D)
+_RIGHT_ANGLES = {90: cv2.ROTATE_90_COUNTERCLOCKWISE,
+                 180: cv2.ROTATE_180,
+                 270: cv2.ROTATE_90_CLOCKWISE}
+
 def rotate_image(image, angle):
     """
     Fait pivoter l'image de l'angle donné en ajustant la taille pour conserver tout le contenu.
+    Les multiples de 90° (cas de image_to_osd) passent par cv2.rotate, sans interpolation.
+    """
+    angle = angle % 360
+    if angle == 0:
+        return image
+    if angle in _RIGHT_ANGLES:
+        return cv2.rotate(image, _RIGHT_ANGLES[angle])
+    return warp_rotate_image(image, angle)
+
+
+def warp_rotate_image(image, angle, border=cv2.BORDER_REPLICATE):
+    """
+    Rotation quelconque par cv2.warpAffine, interpolation bilinéaire,
+    image agrandie pour conserver tout le contenu.
     """
     # Taille originale
     (h, w) = image.shape[:2]
@@ -37,11 +61,76 @@ def rotate_image(image, angle):
     rot_mat[1, 2] += (new_h / 2) - image_center[1]
 
     # Rotation avec nouvelle taille
-    rotated = cv2.warpAffine(image, rot_mat, (new_w, new_h), flags=cv2.INTER_LINEAR)
+    rotated = cv2.warpAffine(image, rot_mat, (new_w, new_h), flags=cv2.INTER_LINEAR,
+                             borderMode=border)
 
     return rotated
 
 
+# Skew estimation: minimum ink contrast, maximum share of ink on the proxy
+# (noise or picture above), and how much sharper than 0° the profile must be
+SKEW_MIN_CONTRAST = 25
+SKEW_MAX_INK = 0.25
+SKEW_MIN_GAIN = 1.05
+
+def estimate_skew(image, max_angle=5.0, proxy_width=600):
+    """
+    Estimate the small skew of a page (degrees, counter-clockwise) with a
+    projection profile on a reduced proxy image: the angle that gives the
+    sharpest horizontal profile aligns the text lines.
+    """
+    if len(image.shape) > 2:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = image
+    # Proxy image, dark strokes against their local background -> white on black
+    scale = min(1.0, proxy_width / gray.shape[1])
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    size = max(3, small.shape[1] // 40) | 1
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+    strokes = cv2.morphologyEx(small, cv2.MORPH_BLACKHAT, kernel)
+    otsu, _ = cv2.threshold(strokes, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    _, ink = cv2.threshold(strokes, max(otsu, SKEW_MIN_CONTRAST), 255, cv2.THRESH_BINARY)
+
+    # Blank page, noise or picture: no line profile to rely on
+    share = (ink > 0).mean()
+    if share == 0 or share > SKEW_MAX_INK:
+        return 0.0
+
+    (h, w) = ink.shape
+    center = (w / 2, h / 2)
+
+    def score(angle):
+        rot_mat = cv2.getRotationMatrix2D(center, angle, 1.0)
+        rotated = cv2.warpAffine(ink, rot_mat, (w, h), flags=cv2.INTER_NEAREST)
+        profile = rotated.sum(axis=1, dtype=np.float64)
+        return np.var(profile)
+
+    def best_of(angles):
+        # highest score, the smallest angle on ties
+        angles = sorted(np.clip(angles, -max_angle, max_angle), key=abs)
+        return max(angles, key=score)
+
+    # Coarse search by 1°, then refine by 0.1° around the best angle
+    best = best_of(np.arange(-max_angle, max_angle + 0.5, 1.0))
+    best = best_of(np.arange(best - 1.0, best + 1.05, 0.1))
+    # Keep the page as is unless the profile is clearly sharper
+    if score(best) <= score(0.0) * SKEW_MIN_GAIN:
+        return 0.0
+    return float(round(best, 1))
+
+
+def deskew(image, max_angle=5.0, min_angle=0.3):
+    """
+    Correct a small skew of the page, return (image, angle)
+    The image is left untouched if the skew is under min_angle.
+    """
+    angle = estimate_skew(image, max_angle)
+    if abs(angle) < min_angle:
+        return image, 0.0
+    return warp_rotate_image(image, angle), angle
+
+
 def adaptative_thresholding(img, threshold):
     """
     """
@@ -56,11 +145,12 @@ def adaptative_thresholding(img, threshold):
     M = int(np.floor(orignrows/16) + 1)
     N = int(np.floor(origncols/16) + 1)
     # Image border padding related to windows size
-    Mextend = round(M/2)-1
-    Nextend = round(N/2)-1
+    # (M-1 rows and N-1 columns, so that there is one window per pixel)
+    Mextend = M//2
+    Nextend = N//2
     # Padding image
-    aux =cv2.copyMakeBorder(gray, top=Mextend, bottom=Mextend, left=Nextend,
-                          right=Nextend, borderType=cv2.BORDER_REFLECT)
+    aux =cv2.copyMakeBorder(gray, top=Mextend, bottom=M-1-Mextend, left=Nextend,
+                          right=N-1-Nextend, borderType=cv2.BORDER_REFLECT)
     windows = np.zeros((M,N),np.int32)
     # Image integral calculation
     imageIntegral = cv2.integral(aux, windows,-1)
@@ -73,8 +163,6 @@ def adaptative_thresholding(img, threshold):
             - imageIntegral[:-M, N:]    #Haut-droite
             + imageIntegral[:-M, :-N]         #Haut-gauche
      )
-    zeros_row = np.zeros((1, result.shape[1]), dtype=result.dtype)
-    result = np.vstack([result, zeros_row])
     # Output binary image memory allocation    
     binar = np.ones((orignrows, origncols), dtype=bool)
     # Gray image weighted by windows size
@@ -2,7 +2,7 @@
     Keypad test code adapted for gpiozero
 """
 from logger import logger
-from constantes import CB
+from constantes import CB, KEYPAD_MAX_POLL
 from gpiozero import OutputDevice, Button
 import time
 
@@ -29,6 +29,13 @@ class Key_GPIO:
         # The GPIO pin of the column of the key that is currently being held down or -1 if no key is pressed
         self.keypadPressed = -1
 
+        # Polling interval in seconds, adjusted by the app governor
+        self.poll_interval = KEYPAD_MAX_POLL
+
+        # Called every idle_period seconds while waiting for a key
+        self.idle_callback = None
+        self.idle_period = 60
+
         # Setup GPIO
         # Lines are outputs
         self.L1_out = OutputDevice(self.L1)
@@ -65,28 +72,27 @@ class Key_GPIO:
         line.on()  # Activate the line
         if self.C1_in.is_active:
             print(characters[0])
-            self.trigger_callback(int(characters[0]))
+            self.trigger_callback(characters[0])
         elif self.C2_in.is_active:
             print(characters[1])
-            self.trigger_callback(int(characters[1]))
+            self.trigger_callback(characters[1])
         elif self.C3_in.is_active:
             print(characters[2])
-            self.trigger_callback(int(characters[2]))
+            self.trigger_callback(characters[2])
         elif self.C4_in.is_active:
             print(characters[3])
-            self.trigger_callback(int(characters[3]))
+            self.trigger_callback(characters[3])
         line.off()  # Deactivate the line
 
-    def trigger_callback(self, key):
+    def trigger_callback(self, character):
         """
         Déclenche le callback associé à une touche.
         """
-        key = CB(key)
-        print("key : ", key)
-        if key in self.dict_callback:
-            action = int(self.dict_callback[key])
-            logger.info(f"Key {key} pressed -> Triggering {action}")
-            self.callbacks[action]()  # Appeler le callback
+        for key, value in self.dict_callback.items():
+            if value == character:
+                print("key : ", key)
+                logger.info(f"Key {key} pressed -> Triggering {character}")
+                self.callbacks[key.value]()  # Appeler le callback
 
     def start(self):
         print("start")
@@ -105,18 +111,23 @@ class Key_GPIO:
                 self.callbacks[key.value]=callback
 
     def listen(self):
+        last_idle = time.monotonic()
         while True:
+            if self.idle_callback is not None and time.monotonic() - last_idle >= self.idle_period:
+                self.idle_callback()
+                last_idle = time.monotonic()
+            poll_interval = min(self.poll_interval, KEYPAD_MAX_POLL)
             # If a button was previously pressed, check whether the user has released it yet
             if self.keypadPressed != -1:
                 self.setAllLines(True)  # Activate all lines
                 if not (self.C1_in.is_active or self.C2_in.is_active or self.C3_in.is_active or self.C4_in.is_active):
                     self.keypadPressed = -1  # No key is pressed
                 else:
-                    time.sleep(0.1)
+                    time.sleep(poll_interval)
             # Otherwise, just read the input
             else:
                 self.readLine(self.L1_out, ["1", "2", "3", "A"])
                 self.readLine(self.L2_out, ["4", "5", "6", "B"])
                 self.readLine(self.L3_out, ["7", "8", "9", "C"])
                 self.readLine(self.L4_out, ["*", "0", "#", "D"])
-                time.sleep(0.1)
\ No newline at end of file
+                time.sleep(poll_interval)
\ No newline at end of file
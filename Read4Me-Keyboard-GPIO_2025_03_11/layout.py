@@ -0,0 +1,107 @@
+import cv2
+import numpy as np
+
+# tesseract page segmentation modes
+PSM_AUTO = 3         # fully automatic page segmentation
+PSM_BLOCK = 6        # single uniform block of text
+PSM_LINE = 7         # single text line
+PSM_SPARSE = 11      # sparse text, as much text as possible in no order
+
+MIN_CONTRAST = 25    # minimum gray level difference between ink and paper
+MAX_INK = 0.25       # more ink than that is noise or a picture, not text
+MAX_LINE_HEIGHT = 0.15  # tallest plausible single line (share of the page)
+MAX_LINE_COVERAGE = 0.3  # a single line covers a small part of the page
+
+
+def _runs(mask, min_length=1):
+    """
+    List of (start, end) of the runs of True values in a 1D mask
+    """
+    padded = np.concatenate(([False], mask, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    return [(s, e) for s, e in zip(edges[::2], edges[1::2]) if e - s >= min_length]
+
+
+def layout_features(image, proxy_width=400):
+    """
+    Cheap layout analysis on a reduced proxy image:
+    - lines: number of text lines
+    - columns: number of text columns
+    - blocks: number of separated text blocks
+    - main_block: share of the ink in the largest block
+    - coverage: share of the page covered by the text blocks
+    - ink: share of the proxy marked as ink
+    - line_height: height of the tallest line, as a share of the page
+    """
+    if len(image.shape) > 2:
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+    else:
+        gray = image
+    scale = min(1.0, proxy_width / gray.shape[1])
+    small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    (h, w) = small.shape
+    # Black top-hat: dark strokes thinner than the kernel against their
+    # local background, so a dark table around the page or vignetting
+    # are not taken for ink
+    size = max(3, w // 40) | 1
+    kernel = cv2.getStructuringElement(cv2.MORPH_RECT, (size, size))
+    strokes = cv2.morphologyEx(small, cv2.MORPH_BLACKHAT, kernel)
+    otsu, _ = cv2.threshold(strokes, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+    _, ink = cv2.threshold(strokes, max(otsu, MIN_CONTRAST), 255, cv2.THRESH_BINARY)
+
+    # Letters merged into words and lines
+    words = cv2.dilate(ink, np.ones((1, max(3, w // 50)), np.uint8))
+
+    # Lines: runs of rows with ink
+    rows = (words > 0).sum(axis=1) > max(2, w // 100)
+    line_runs = _runs(rows, min_length=2)
+    lines = len(line_runs)
+    line_height = max([e - s for s, e in line_runs], default=0) / float(h)
+
+    # Columns: ink bands separated by wide blank vertical gaps
+    cols = (words > 0).sum(axis=0) > max(1, h // 100)
+    columns = len(_runs(cols, min_length=w // 20))
+
+    # Blocks: connected components after merging lines into paragraphs
+    paragraphs = cv2.dilate(words, np.ones((max(3, h // 25), max(3, w // 25)), np.uint8))
+    count, labels, stats, _ = cv2.connectedComponentsWithStats(paragraphs)
+    areas = stats[1:, cv2.CC_STAT_AREA]
+    keep = areas > (h * w) // 500
+    blocks = int(keep.sum())
+    if blocks:
+        ink_per_block = np.bincount(labels[ink > 0], minlength=count)[1:][keep]
+        main_block = float(ink_per_block.max()) / max(1, ink_per_block.sum())
+        coverage = float(areas[keep].sum()) / (h * w)
+    else:
+        main_block = 0.0
+        coverage = 0.0
+
+    return {'lines': lines, 'columns': columns, 'blocks': blocks,
+            'main_block': round(float(main_block), 2), 'coverage': round(coverage, 2),
+            'ink': round(float((ink > 0).mean()), 3), 'line_height': round(float(line_height), 2)}
+
+
+def choose_psm(image):
+    """
+    Choose the cheapest suitable tesseract page segmentation mode
+    Return (psm, features)
+    """
+    f = layout_features(image)
+    if f['blocks'] == 0 or f['ink'] > MAX_INK:
+        # nothing recognized as text, or noise: let tesseract analyse the page
+        psm = PSM_AUTO
+    elif f['lines'] == 1:
+        if f['line_height'] <= MAX_LINE_HEIGHT and f['coverage'] <= MAX_LINE_COVERAGE:
+            psm = PSM_LINE
+        else:
+            # one tall run of rows is not a plausible text line
+            psm = PSM_AUTO
+    elif f['blocks'] >= 3 and f['main_block'] < 0.6 and f['coverage'] < 0.15:
+        psm = PSM_SPARSE
+    elif f['columns'] >= 2:
+        psm = PSM_AUTO
+    elif f['main_block'] >= 0.9:
+        psm = PSM_BLOCK
+    else:
+        psm = PSM_AUTO
+    return psm, f
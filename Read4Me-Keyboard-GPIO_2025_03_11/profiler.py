@@ -0,0 +1,86 @@
+import os
+import time
+import cProfile
+import datetime
+import pstats
+
+from logger import logger, handler
+
+
+class CaptureProfiler:
+    """
+    Profile a capture on demand
+
+    - arm(): profile the next run only (keypad key)
+    - READFORME_PROFILE=1 in the environment: profile every run
+
+    cProfile uses the wall clock, so the time spent waiting on child
+    processes (camera, tesseract, pico2wave) shows up in os.system and
+    subprocess calls. The CPU time used by the children is added to the
+    summary. Profiles are saved next to debug.log:
+    profile_<date>_<time>_<ms>.prof (pstats format) and .txt (summary).
+    on_saved / on_error are called once the profile is saved, or could
+    not be saved.
+    """
+    def __init__(self, on_saved=None, on_error=None):
+        self.on_saved = on_saved
+        self.on_error = on_error
+        self.always = os.environ.get('READFORME_PROFILE', '0') not in ('', '0')
+        self.armed = False
+        self.directory = os.path.dirname(os.path.abspath(handler.baseFilename))
+
+    def arm(self):
+        """
+        Profile the next run
+        """
+        logger.info('profiler.arm')
+        self.armed = True
+
+    def run(self, func):
+        """
+        Call func, profiled if armed or always on
+        """
+        if not (self.armed or self.always):
+            return func()
+        self.armed = False
+
+        profile = cProfile.Profile(time.perf_counter)
+        times = os.times()
+        start = time.perf_counter()
+        try:
+            return profile.runcall(func)
+        finally:
+            elapsed = time.perf_counter() - start
+            children = os.times()
+            children_cpu = (children.children_user - times.children_user
+                            + children.children_system - times.children_system)
+            callback = self.on_saved if self.save(profile, elapsed, children_cpu) else self.on_error
+            if callback is not None:
+                callback()
+
+    def save(self, profile, elapsed, children_cpu):
+        """
+        Write the profile and a text summary, return True if saved
+        """
+        now = datetime.datetime.now()
+        stem = os.path.join(self.directory, now.strftime('profile_%Y%m%d_%H%M%S_')
+                            + '%03d' % (now.microsecond // 1000))
+        # several profiles in the same millisecond: add a counter
+        basename = stem
+        count = 1
+        while os.path.exists(basename + '.prof'):
+            basename = '%s-%d' % (stem, count)
+            count += 1
+        try:
+            profile.dump_stats(basename + '.prof')
+            with open(basename + '.txt', 'w') as f:
+                f.write('wall time: %.2f s\n' % elapsed)
+                f.write('child processes CPU time: %.2f s\n\n' % children_cpu)
+                stats = pstats.Stats(profile, stream=f)
+                stats.sort_stats('cumulative').print_stats(40)
+            logger.info('profiler: %.2f s, children CPU %.2f s, saved %s.prof'
+                        % (elapsed, children_cpu, basename))
+            return True
+        except Exception as e:
+            logger.error('profiler: cannot save profile: %s' % e)
+            return False
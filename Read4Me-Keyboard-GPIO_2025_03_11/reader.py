@@ -1,4 +1,6 @@
 import os
+import time
+import json
 import numpy as np
 from logger import logger
 from constantes import *
@@ -6,7 +8,8 @@ import pytesseract as pyt
 from PIL import Image
 import cv2
 import shutil
-from img_filter import rotate_image, adaptative_thresholding, toImgPIL, toImgOpenCV
+from img_filter import rotate_image, deskew, adaptative_thresholding, toImgPIL, toImgOpenCV
+from layout import choose_psm, PSM_AUTO
 
 def clean_text(basename):
     """Text cleanup """
@@ -29,11 +32,34 @@ def snapshot(basename, extension='.jpg'):
     cmd = CMD_CAMERA + ' ' + outfile
     logger.info(cmd)
     os.system(cmd)
+    logger.info('capture jpeg: file %d bytes' % os.stat(outfile).st_size)
 
     # Copie la photo dans le dossier Pictures
     pictures_dir = '/home/pi/Pictures/'
     shutil.copy(outfile, pictures_dir + 'base' + extension)
 
+def snapshot_gray(basename, width, height, extension='.yuv'):
+    """
+    Grab a scaled YUV420 frame and return its luma (Y) plane
+    as a grayscale numpy array (height x width)
+    """
+    logger.info('reader.snapshot_gray')
+    outfile = basename + extension
+    cmd = CMD_CAMERA_GRAY % (width, height) + ' ' + outfile
+    logger.info(cmd)
+    os.system(cmd)
+
+    data = np.fromfile(outfile, dtype=np.uint8)
+    # Y plane first (stride x height), then U and V at half resolution;
+    # lines may be padded, the stride is deduced from the file size
+    stride = len(data) * 2 // (height * 3)
+    luma = data[:stride * height].reshape(height, stride)
+    if stride != width:
+        luma = np.ascontiguousarray(luma[:, :width])
+    logger.info('capture gray %dx%d: file %d bytes, image %d bytes'
+                % (width, height, len(data), luma.nbytes))
+    return luma
+
 def ocr_to_text1(basename, extension='.jpg'):
     """OCR using tesseract"""
     logger.info('reader.ocr_to_text')
@@ -45,7 +71,7 @@ def ocr_to_text1(basename, extension='.jpg'):
     #proc.wait()
     return
 
-def _filter(basename, img, b_rotation, b_filter):
+def _filter(basename, img, b_rotation, b_filter, b_deskew=False):
     """ img PIL format """
     logger.info('_filter image')
     img_filt_cv2=None
@@ -57,6 +83,13 @@ def _filter(basename, img, b_rotation, b_filter):
         if osd_info['rotate'] != 0:  
             img_filt_cv2 = rotate_image(np.asarray(img), - osd_info['rotate'])
             cv2.imwrite(pictures_dir + 'rotation' + extension, img_filt_cv2)
+    if b_deskew is True:
+        img_src = np.asarray(img) if img_filt_cv2 is None else img_filt_cv2
+        img_deskew, angle = deskew(img_src)
+        logger.info('deskew angle: %s' % angle)
+        if angle != 0:
+            img_filt_cv2 = img_deskew
+            cv2.imwrite(pictures_dir + 'deskew' + extension, img_filt_cv2)
     if b_filter is True:
         if img_filt_cv2 is None:
             # filter with image without rotation
@@ -77,13 +110,155 @@ def _filter(basename, img, b_rotation, b_filter):
         img_filt_pil = toImgPIL(img_filt_cv2)
         return img_filt_pil
 
-def ocr_to_text(basename, b_rotation=False, b_filter=False,  extension='.jpg'):
-    """OCR using tesseract"""
+def _select_psm(img, psm):
+    """Page segmentation mode for the image, chosen from its layout if psm is 'auto'"""
+    if psm != 'auto':
+        return int(psm)
+    start = time.perf_counter()
+    psm, features = choose_psm(np.asarray(img))
+    logger.info('layout %s -> psm %d (%.0f ms)'
+                % (features, psm, (time.perf_counter() - start) * 1000))
+    return psm
+
+def _compare_psm(img, psm, elapsed, ocr):
+    """
+    Debug (OCR_SETTINGS['compare_psm']): OCR again with --psm 3 using the
+    same ocr(img, psm) call, and log the time saved by the chosen mode
+    """
+    if not OCR_SETTINGS['compare_psm'] or psm == PSM_AUTO:
+        return
+    start = time.perf_counter()
+    ocr(img, PSM_AUTO)
+    elapsed_auto = time.perf_counter() - start
+    logger.info('ocr psm %d saved %.2f s against psm %d (%.2f s)'
+                % (psm, elapsed_auto - elapsed, PSM_AUTO, elapsed_auto))
+
+def _ocr_data(img, psm):
+    """
+    OCR with word confidences
+    Return (text, mean confidence of the words, number of words)
+    """
+    data = pyt.image_to_data(img, lang='fra', config='--psm %d' % psm,
+                             output_type=pyt.Output.DICT)
+    lines = {}
+    confidences = []
+    for i, word in enumerate(data['text']):
+        conf = float(data['conf'][i])
+        if conf < 0 or not word.strip():
+            continue
+        confidences.append(conf)
+        key = (data['block_num'][i], data['par_num'][i], data['line_num'][i])
+        lines.setdefault(key, []).append(word.strip())
+    # Rebuild the text: words by line, blank line between paragraphs
+    texte = ''
+    previous = None
+    for key in sorted(lines):
+        if previous is not None:
+            texte += '\n\n' if key[:2] != previous[:2] else '\n'
+        texte += ' '.join(lines[key])
+        previous = key
+    mean_conf = sum(confidences) / len(confidences) if confidences else 0.0
+    return texte, mean_conf, len(confidences)
+
+def _tier_image(img, tier):
+    """
+    Image preprocessed for an OCR tier (img PIL format)
+    0 light: image as is (rotation and deskew already done)
+    1 binarize: adaptative thresholding
+    2 upscale: upscaling to OCR_TIERS['upscale_width'] (x2 at most),
+      then adaptative thresholding
+    """
+    if tier == 0:
+        return img
+    img_cv2 = np.asarray(img)
+    if tier >= 2:
+        scale = min(2.0, OCR_TIERS['upscale_width'] / float(img.width))
+        img_cv2 = cv2.resize(img_cv2, None, fx=scale, fy=scale, interpolation=cv2.INTER_CUBIC)
+    return Image.fromarray(adaptative_thresholding(img_cv2, 20))
+
+# Escalation counters since startup
+tier_stats = {'captures': 0, 'escalations': [0] * len(OCR_TIERS['names'])}
+
+def _ocr_tiered(img, psm, max_tier):
+    """
+    Tiered OCR: OCR the lightly processed image first, escalate to heavier
+    preprocessing only while confidence or text yield are too low, and keep
+    the best result. Timings are logged and appended to OCR_TIERS['stats_file'].
+    """
+    settings = OCR_TIERS
+    max_tier = min(max_tier, len(settings['names']) - 1)
+    min_words = settings['min_words_psm'].get(psm, settings['min_words'])
+    if img.width >= settings['upscale_width']:
+        # already large enough, upscaling would only cost memory and time
+        max_tier = min(max_tier, 1)
+    results = []
+    for tier in range(max_tier + 1):
+        start = time.perf_counter()
+        texte, conf, words = _ocr_data(_tier_image(img, tier), psm)
+        elapsed = time.perf_counter() - start
+        results.append({'tier': tier, 'name': settings['names'][tier],
+                        'seconds': round(elapsed, 3),
+                        'confidence': round(conf, 1), 'words': words,
+                        'text': texte})
+        logger.info('ocr tier %d %s: %.2f s, confidence %.1f, %d words'
+                    % (tier, settings['names'][tier], elapsed, conf, words))
+        if tier == 0:
+            _compare_psm(img, psm, elapsed, _ocr_data)
+        if words > 0 and conf >= settings['min_confidence'] \
+                and (words >= min_words or conf >= settings['confident']):
+            break
+        if tier < max_tier:
+            tier_stats['escalations'][tier + 1] += 1
+
+    # best: the highest sum of word confidences, so that a tier losing
+    # most of the text does not win on confidence alone
+    best = max(results, key=lambda r: r['confidence'] * r['words'])
+    tier_stats['captures'] += 1
+    rates = ['%.0f%%' % (100.0 * n / tier_stats['captures'])
+             for n in tier_stats['escalations'][1:]]
+    logger.info('ocr tier %d kept, escalation rates %s over %d captures'
+                % (best['tier'], rates, tier_stats['captures']))
+
+    record = {'time': time.strftime('%Y-%m-%d %H:%M:%S'), 'psm': psm,
+              'kept': best['tier'],
+              'tiers': [{k: v for k, v in r.items() if k != 'text'} for r in results]}
+    try:
+        with open(settings['stats_file'], 'a') as f:
+            f.write(json.dumps(record) + '\n')
+    except Exception as e:
+        logger.error('ocr stats: %s' % e)
+    return best['text']
+
+def ocr_to_text(basename, b_rotation=False, b_filter=False,  extension='.jpg', b_deskew=False, psm=None,
+                max_tier=None, image=None):
+    """
+    OCR using tesseract
+    If max_tier is given, use the tiered OCR up to this tier (see _ocr_tiered)
+    If image (grayscale numpy array, see snapshot_gray) is given, it is used
+    instead of the file basename+extension, without color conversion.
+    """
     logger.info('reader.ocr_to_text')
-    img = Image.open(basename+extension)
-    if b_rotation is True or b_filter is True:
-        img =_filter(basename, img, b_rotation, b_filter)
-    texte = pyt.image_to_string(img, lang='fra')
+    if image is not None:
+        img = Image.fromarray(image)
+    else:
+        img = Image.open(basename+extension)
+        img.load()
+    logger.info('image %dx%d %s: %d bytes'
+                % (img.width, img.height, img.mode, img.width * img.height * len(img.getbands())))
+    if b_rotation is True or b_filter is True or b_deskew is True:
+        img =_filter(basename, img, b_rotation, b_filter, b_deskew)
+    if psm is None:
+        psm = OCR_SETTINGS['psm']
+    psm = _select_psm(img, psm)
+    if max_tier is not None:
+        texte = _ocr_tiered(img, psm, max_tier)
+    else:
+        start = time.perf_counter()
+        texte = pyt.image_to_string(img, lang='fra', config='--psm %d' % psm)
+        elapsed = time.perf_counter() - start
+        logger.info('ocr psm %d: %.2f s' % (psm, elapsed))
+        _compare_psm(img, psm, elapsed,
+                     lambda img, psm: pyt.image_to_string(img, lang='fra', config='--psm %d' % psm))
     outputfile = basename + '_raw' + '.txt'
     with open(outputfile, 'w') as outfile:
             outfile.write(texte)
@@ -0,0 +1,292 @@
+"""
+    Keypress to first word latency simulator, runnable off the Pi
+
+    Replay scripted key sequences against the real App, with a fake keypad,
+    camera, OCR and TTS timing models and an audio sink that records when
+    playback starts.
+
+    Run using:
+    $ python3 simulator.py [scenario ...] [--runs N] [--scale S]
+"""
+import argparse
+import math
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+
+import app as app_module
+import reader
+from app import App
+from constantes import TAB_KEYBOARD, CB, GOVERNOR_SETTINGS, KEYPAD_MAX_POLL
+from governor import Governor
+
+
+class SimClock:
+    """
+    Scaled wall clock: one simulated second lasts `scale` real seconds
+
+    Callbacks run synchronously in listen(), as with Key_GPIO: while a
+    capture sleeps through its steps, no key is dispatched. Sleeps are
+    real (scaled) rather than virtual so that a future threaded App
+    would still be measured correctly.
+    """
+    def __init__(self, scale=0.02):
+        self.scale = scale
+        self.t0 = time.perf_counter()
+
+    def now(self):
+        return (time.perf_counter() - self.t0) / self.scale
+
+    def time(self):
+        return self.now()
+
+    def perf_counter(self):
+        return self.now()
+
+    def sleep(self, seconds):
+        if seconds > 0:
+            time.sleep(seconds * self.scale)
+
+
+class TimingModel:
+    """
+    Duration of a step: gaussian around mean, never negative
+    """
+    def __init__(self, mean, jitter=0.0):
+        self.mean = mean
+        self.jitter = jitter
+
+    def sample(self, rng):
+        return max(0.0, rng.gauss(self.mean, self.jitter))
+
+
+# Assumed durations in seconds (not measured): replace them with timings
+# from debug.log on the device (app.capture.snapshot, ocr tier, ...)
+DEFAULT_MODELS = {'camera': TimingModel(1.2, 0.1),
+                  'ocr': TimingModel(9.0, 2.0),
+                  'tts': TimingModel(2.5, 0.5)}
+
+# Scripted key sequences: (time in s, keypad character)
+SCENARIOS = {
+    'capture': [(0.0, '1')],
+    'cancel': [(0.0, '1'), (3.0, '7')],
+    'volume_during_ocr': [(0.0, '1'), (4.0, '3'), (5.0, '3'), (6.0, '2')],
+    'double_capture': [(0.0, '1'), (2.0, '1')],
+    'pause_after_read': [(0.0, '1'), (20.0, '4'), (22.0, '4')],
+    'profile': [(0.0, 'A'), (1.0, '1')],
+}
+
+
+class FakePlayer:
+    """
+    Audio sink with the Player interface, record every command with its time
+    """
+    def __init__(self, clock):
+        self.clock = clock
+        self.events = []
+        self.playing = False
+
+    def _record(self, action, arg=None):
+        self.events.append((self.clock.now(), action, arg))
+
+    def play(self, basename, extension='wav'):
+        self._record('play', basename)
+        self.playing = True
+
+    def pause(self):
+        self._record('pause')
+
+    def stop(self):
+        self._record('stop')
+        self.playing = False
+
+    def forward(self):
+        self._record('forward')
+
+    def backward(self):
+        self._record('backward')
+
+    def speed_set(self, value):
+        self._record('speed', value)
+
+    def volume_set(self, value):
+        self._record('volume', value)
+
+    def close(self):
+        self._record('close')
+
+
+class FakeKeypad:
+    """
+    Keypad with the Key_GPIO interface, replay a script of key presses
+
+    As with Key_GPIO, the keys are read every poll_interval (set by the
+    App, capped to KEYPAD_MAX_POLL) and the next poll comes one interval
+    after a callback returns: a press is dispatched at the first poll tick
+    after it, and if a callback is still running, the next presses are
+    delayed and recorded as stuck UI.
+    """
+    def __init__(self, dict_callback, script, clock):
+        self.dict_callback = dict_callback
+        self.script = sorted(script)
+        self.clock = clock
+        self.callbacks = []
+        self.poll_interval = KEYPAD_MAX_POLL
+        self.presses = []
+
+    def start(self):
+        pass
+
+    def links(self, callbacks):
+        self.callbacks = callbacks
+
+    def trigger_callback(self, character):
+        for key, value in self.dict_callback.items():
+            if value == character and self.callbacks[key.value]:
+                self.callbacks[key.value]()
+
+    def listen(self):
+        tick = self.clock.now()
+        for t, character in self.script:
+            poll_interval = min(self.poll_interval, KEYPAD_MAX_POLL)
+            if tick < t:
+                tick += math.ceil((t - tick) / poll_interval) * poll_interval
+            self.clock.sleep(tick - self.clock.now())
+            dispatched = self.clock.now()
+            self.trigger_callback(character)
+            done = self.clock.now()
+            self.presses.append({'key': character, 'pressed': t,
+                                 'dispatched': dispatched, 'done': done})
+            tick = done + poll_interval
+
+
+class Simulation:
+    """
+    Run one scenario against the real App with simulated devices
+    """
+    def __init__(self, script, models=DEFAULT_MODELS, scale=0.02, seed=0):
+        self.script = script
+        self.models = models
+        self.clock = SimClock(scale)
+        self.rng = random.Random(seed)
+
+    # fake reader steps ######################################
+    def snapshot(self, basename, *args, **kwargs):
+        self.clock.sleep(self.models['camera'].sample(self.rng))
+
+    def snapshot_gray(self, basename, *args, **kwargs):
+        self.clock.sleep(self.models['camera'].sample(self.rng))
+
+    def ocr_to_text(self, basename, *args, **kwargs):
+        self.clock.sleep(self.models['ocr'].sample(self.rng))
+        with open(basename + '_raw' + '.txt', 'w') as outfile:
+            outfile.write('Texte simulé.\n')
+
+    def text_to_sound(self, basename, *args, **kwargs):
+        self.clock.sleep(self.models['tts'].sample(self.rng))
+
+    def run(self):
+        """
+        Replay the script, return (key presses, player events, basename)
+
+        The host is left untouched: the governor reads an empty sysfs tree
+        (normal state), and the settings file and the profiles go to a
+        temporary directory, removed afterwards.
+        """
+        workdir = tempfile.mkdtemp(prefix='readforme_sim_')
+        patches = {(reader, 'snapshot'): self.snapshot,
+                   (reader, 'snapshot_gray'): self.snapshot_gray,
+                   (reader, 'ocr_to_text'): self.ocr_to_text,
+                   (reader, 'text_to_sound'): self.text_to_sound,
+                   (app_module, 'time'): self.clock,
+                   (app_module, 'CONFIG_FILE'): os.path.join(workdir, 'config.json')}
+
+        saved = {target: getattr(*target) for target in patches}
+        omp_thread_limit = os.environ.get('OMP_THREAD_LIMIT')
+        try:
+            for (module, name), value in patches.items():
+                setattr(module, name, value)
+            player = FakePlayer(self.clock)
+            keypad = FakeKeypad(TAB_KEYBOARD, self.script, self.clock)
+            app = App(keyGPIO=keypad, player=player)
+            app.governor = Governor(dict(GOVERNOR_SETTINGS, sysfs_root=workdir))
+            app.profiler.directory = workdir
+            app.start()
+            app.wait()
+            app.close()
+        finally:
+            for (module, name), value in saved.items():
+                setattr(module, name, value)
+            if omp_thread_limit is None:
+                os.environ.pop('OMP_THREAD_LIMIT', None)
+            else:
+                os.environ['OMP_THREAD_LIMIT'] = omp_thread_limit
+            shutil.rmtree(workdir, ignore_errors=True)
+        return keypad.presses, player.events, app.basename
+
+
+def analyse(presses, events, basename, stuck_threshold=0.5):
+    """
+    Keypress to first word latencies and stuck UI intervals of one run
+    (key presses dispatched more than stuck_threshold seconds late)
+    """
+    capture_key = TAB_KEYBOARD[CB.CAPTURE]
+    reads = [t for t, action, arg in events if action == 'play' and arg == basename]
+    latencies = []
+    for press in presses:
+        if press['key'] != capture_key:
+            continue
+        after = [t for t in reads if t >= press['dispatched']]
+        if after:
+            latencies.append(after[0] - press['pressed'])
+            reads.remove(after[0])
+    stuck = [(press['key'], press['pressed'], press['dispatched'] - press['pressed'])
+             for press in presses
+             if press['dispatched'] - press['pressed'] > stuck_threshold]
+    return latencies, stuck
+
+
+def describe(values):
+    """
+    min / median / p90 / max of a list of durations
+    """
+    if not values:
+        return 'n/a'
+    p90 = statistics.quantiles(values, n=10, method='inclusive')[-1] if len(values) > 1 else values[0]
+    return 'min %.2f  median %.2f  p90 %.2f  max %.2f  (n=%d)' % (
+        min(values), statistics.median(values), p90, max(values), len(values))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('scenarios', nargs='*', metavar='scenario',
+                        help='one of %s (default: all)' % ', '.join(SCENARIOS))
+    parser.add_argument('--runs', type=int, default=10)
+    parser.add_argument('--scale', type=float, default=0.02,
+                        help='real seconds per simulated second')
+    args = parser.parse_args()
+    for name in args.scenarios:
+        if name not in SCENARIOS:
+            parser.error('unknown scenario: %s' % name)
+
+    for name in args.scenarios or list(SCENARIOS):
+        latencies = []
+        stuck = []
+        for seed in range(args.runs):
+            sim = Simulation(SCENARIOS[name], scale=args.scale, seed=seed)
+            run_latencies, run_stuck = analyse(*sim.run())
+            latencies += run_latencies
+            stuck += run_stuck
+        print('%s (%d runs)' % (name, args.runs))
+        print('  keypress to first word (s): %s' % describe(latencies))
+        print('  stuck UI (s):               %s' % describe([s[2] for s in stuck]))
+        for key in sorted(set(s[0] for s in stuck)):
+            delays = [s[2] for s in stuck if s[0] == key]
+            print('    key %s delayed %d times, %s' % (key, len(delays), describe(delays)))
+
+
+if __name__ == '__main__':
+    main()
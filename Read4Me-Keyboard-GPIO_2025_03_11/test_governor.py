@@ -0,0 +1,87 @@
+"""
+    Governor decisions on a fake sysfs tree (settings['sysfs_root'])
+
+    Run using:
+    $ python3 -m pytest test_governor.py
+"""
+import os
+
+from constantes import GOVERNOR_SETTINGS, KEYPAD_MAX_POLL
+from governor import Governor
+
+
+def write(root, path, value):
+    path = os.path.join(str(root), path.lstrip('/'))
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'w') as f:
+        f.write(value + '\n')
+
+
+def governor(root):
+    """Governor reading the fake sysfs tree under root"""
+    return Governor(dict(GOVERNOR_SETTINGS, sysfs_root=str(root)))
+
+
+def device(root, temp=None, throttled=None, battery=None, status=None):
+    s = GOVERNOR_SETTINGS
+    if temp is not None:
+        write(root, s['temp_path'], str(int(temp * 1000)))
+    if throttled is not None:
+        write(root, s['throttled_path'], throttled)
+    if battery is not None:
+        write(root, s['battery_path'], str(battery))
+    if status is not None:
+        write(root, s['battery_status_path'], status)
+
+
+def test_normal(tmp_path):
+    device(tmp_path, temp=45, throttled='0', battery=80, status='Discharging')
+    g = governor(tmp_path)
+    decision = g.decide()
+    assert decision['state'] == 'normal'
+    assert decision['threads'] == g.cpus
+    assert decision['tier'] == 'full'
+
+
+def test_warm(tmp_path):
+    device(tmp_path, temp=68, throttled='0', battery=80, status='Discharging')
+    decision = governor(tmp_path).decide()
+    assert decision['state'] == 'warm'
+    assert decision['tier'] == 'full'
+
+
+def test_low_battery_is_warm(tmp_path):
+    device(tmp_path, temp=45, battery=25, status='Discharging')
+    assert governor(tmp_path).decide()['state'] == 'warm'
+
+
+def test_hot(tmp_path):
+    device(tmp_path, temp=78, throttled='50005', battery=80, status='Discharging')
+    decision = governor(tmp_path).decide()
+    assert decision == {'state': 'hot', 'threads': 1, 'tier': 'light',
+                        'poll': KEYPAD_MAX_POLL}
+
+
+def test_throttled_only_is_hot(tmp_path):
+    device(tmp_path, temp=50, throttled='4')
+    assert governor(tmp_path).decide()['state'] == 'hot'
+
+
+def test_charging_ignores_battery_level(tmp_path):
+    device(tmp_path, temp=45, battery=5, status='Charging')
+    g = governor(tmp_path)
+    assert g.battery() is None
+    assert g.decide()['state'] == 'normal'
+
+
+def test_missing_files(tmp_path):
+    g = governor(tmp_path)
+    assert (g.temperature(), g.throttled(), g.battery()) == (None, None, None)
+    assert g.decide()['state'] == 'normal'
+
+
+def test_poll_interval_catches_taps():
+    polls = GOVERNOR_SETTINGS['poll_interval']
+    assert all(poll <= KEYPAD_MAX_POLL for poll in polls.values())
+    # no faster scanning when warm or hot
+    assert polls['warm'] == polls['hot'] == KEYPAD_MAX_POLL
@@ -0,0 +1,56 @@
+"""
+    Rotation fast path and skew estimation on synthetic captures
+
+    Run using:
+    $ python3 -m pytest test_img_filter.py
+"""
+import numpy as np
+import pytest
+
+from benchmark import synthetic_page, shifted_diff
+from img_filter import rotate_image, warp_rotate_image, estimate_skew, deskew
+
+
+@pytest.fixture(scope='module')
+def page():
+    return synthetic_page(1200, 1600, lines=20)
+
+
+@pytest.mark.parametrize('angle', [90, 180, 270, -90])
+def test_right_angles_match_warp(page, angle):
+    assert shifted_diff(warp_rotate_image(page, angle), rotate_image(page, angle)) == 0
+
+
+def test_zero_angle_is_untouched(page):
+    assert rotate_image(page, 360) is page
+
+
+def test_blank_page():
+    blank = np.full((1600, 1200), 255, np.uint8)
+    assert estimate_skew(blank) == 0.0
+    image, angle = deskew(blank)
+    assert angle == 0.0 and image is blank
+
+
+def test_uniform_gray():
+    assert estimate_skew(np.full((1600, 1200), 128, np.uint8)) == 0.0
+
+
+def test_noise():
+    noise = np.random.RandomState(0).randint(0, 256, (1600, 1200)).astype(np.uint8)
+    assert estimate_skew(noise) == 0.0
+
+
+def test_straight_page(page):
+    assert abs(estimate_skew(page)) <= 0.2
+
+
+@pytest.mark.parametrize('tilt', [-3.0, -1.0, 1.5, 4.0])
+def test_tilted_page(page, tilt):
+    angle = estimate_skew(warp_rotate_image(page, tilt))
+    assert abs(angle + tilt) <= 0.3
+
+
+def test_angle_within_limit(page):
+    angle = estimate_skew(warp_rotate_image(page, 8.0), max_angle=5.0)
+    assert abs(angle) <= 5.0
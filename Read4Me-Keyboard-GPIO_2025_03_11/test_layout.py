@@ -0,0 +1,78 @@
+"""
+    Page segmentation mode choice on synthetic captures
+
+    Run using:
+    $ python3 -m pytest test_layout.py
+"""
+import cv2
+import numpy as np
+
+from layout import choose_psm, PSM_AUTO, PSM_BLOCK, PSM_LINE, PSM_SPARSE
+
+
+def canvas(value=255):
+    return np.full((1600, 1200), value, np.uint8)
+
+
+def text(img, s, x, y, scale=1.2):
+    cv2.putText(img, s, (x, y), cv2.FONT_HERSHEY_SIMPLEX, scale, 0, 2)
+
+
+def paragraph(img=None, lines=15):
+    img = canvas() if img is None else img
+    for i in range(lines):
+        text(img, 'Lorem ipsum dolor sit amet consectetur', 60, 100 + i * 60)
+    return img
+
+
+def test_single_line():
+    img = canvas()
+    text(img, 'Doliprane 1000 mg', 200, 800, 2)
+    assert choose_psm(img)[0] == PSM_LINE
+
+
+def test_block():
+    assert choose_psm(paragraph())[0] == PSM_BLOCK
+
+
+def test_two_columns():
+    img = canvas()
+    for i in range(20):
+        text(img, 'Lorem ipsum dolor', 40, 200 + i * 60, 1.0)
+        text(img, 'sit amet consect', 650, 200 + i * 60, 1.0)
+    assert choose_psm(img)[0] == PSM_AUTO
+
+
+def test_sparse_label():
+    img = canvas()
+    text(img, 'PRIX 3,50', 100, 200)
+    text(img, 'Lot 4421', 800, 600)
+    text(img, 'EXP 12/27', 300, 1300)
+    text(img, 'Bio', 900, 1500)
+    assert choose_psm(img)[0] == PSM_SPARSE
+
+
+def test_page_on_dark_table():
+    img = canvas(90)
+    img[300:1300, 200:1000] = 235
+    for i in range(10):
+        text(img, 'Lorem ipsum dolor sit', 230, 400 + i * 85, 1.0)
+    assert choose_psm(img)[0] == PSM_BLOCK
+
+
+def test_vignetting():
+    yy, xx = np.mgrid[0:1600, 0:1200]
+    r = np.hypot((yy - 800) / 800.0, (xx - 600) / 600.0)
+    # full frame page, corners at 30% of the centre brightness
+    img = paragraph(lines=25).astype(np.float64) * (1 - 0.35 * r ** 2)
+    img = np.clip(img, 0, 255).astype(np.uint8)
+    assert choose_psm(img)[0] == PSM_BLOCK
+
+
+def test_noise():
+    img = np.random.RandomState(0).randint(0, 256, (1600, 1200)).astype(np.uint8)
+    assert choose_psm(img)[0] == PSM_AUTO
+
+
+def test_blank():
+    assert choose_psm(canvas())[0] == PSM_AUTO
@@ -0,0 +1,41 @@
+"""
+    Profile acknowledgement once saved
+
+    Run using:
+    $ python3 -m pytest test_profiler.py
+"""
+import os
+
+from profiler import CaptureProfiler
+
+
+def profiler(directory, events):
+    p = CaptureProfiler(on_saved=lambda: events.append('saved'),
+                        on_error=lambda: events.append('error'))
+    p.directory = str(directory)
+    return p
+
+
+def test_not_armed(tmp_path):
+    events = []
+    p = profiler(tmp_path, events)
+    p.always = False
+    assert p.run(lambda: 'text') == 'text'
+    assert events == [] and os.listdir(str(tmp_path)) == []
+
+
+def test_saved(tmp_path):
+    events = []
+    p = profiler(tmp_path, events)
+    p.arm()
+    assert p.run(lambda: 'text') == 'text'
+    assert events == ['saved']
+    assert sorted(os.path.splitext(name)[1] for name in os.listdir(str(tmp_path))) == ['.prof', '.txt']
+
+
+def test_save_error(tmp_path):
+    events = []
+    p = profiler(tmp_path / 'missing', events)
+    p.arm()
+    assert p.run(lambda: 'text') == 'text'
+    assert events == ['error']
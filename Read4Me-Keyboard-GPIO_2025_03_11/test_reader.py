@@ -0,0 +1,106 @@
+"""
+    Tiered OCR escalation rules, with the OCR results mocked
+
+    Run using:
+    $ python3 -m pytest test_reader.py
+"""
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import reader
+from layout import PSM_BLOCK, PSM_LINE, PSM_SPARSE
+
+
+@pytest.fixture
+def ocr(tmp_path, monkeypatch):
+    """
+    Replace _ocr_data by a list of (confidence, words) results, one per
+    tier, and return the list of tiers actually run
+    """
+    monkeypatch.setitem(reader.OCR_TIERS, 'stats_file', str(tmp_path / 'ocr_stats.jsonl'))
+    monkeypatch.setattr(reader, 'tier_stats',
+                        {'captures': 0, 'escalations': [0] * len(reader.OCR_TIERS['names'])})
+    calls = []
+
+    def setup(results):
+        def fake(img, psm):
+            conf, words = results[len(calls)]
+            calls.append(len(calls))
+            return 'tier%d' % (len(calls) - 1), conf, words
+        monkeypatch.setattr(reader, '_ocr_data', fake)
+        return calls
+    return setup
+
+
+def image(width=1000):
+    return Image.fromarray(np.full((width // 2, width), 255, np.uint8))
+
+
+def test_good_first_pass_is_kept(ocr):
+    calls = ocr([(90, 200)])
+    assert reader._ocr_tiered(image(), PSM_BLOCK, 2) == 'tier0'
+    assert calls == [0]
+
+
+def test_low_confidence_escalates(ocr):
+    calls = ocr([(40, 100), (80, 100)])
+    assert reader._ocr_tiered(image(), PSM_BLOCK, 2) == 'tier1'
+    assert calls == [0, 1]
+    assert reader.tier_stats['escalations'] == [0, 1, 0]
+
+
+def test_empty_result_escalates(ocr):
+    calls = ocr([(0, 0), (0, 0), (0, 0)])
+    reader._ocr_tiered(image(), PSM_LINE, 2)
+    assert calls == [0, 1, 2]
+
+
+@pytest.mark.parametrize('psm', [PSM_LINE, PSM_SPARSE])
+def test_short_text_single_line_or_sparse(ocr, psm):
+    # min_words_psm: one word is enough
+    calls = ocr([(75, 2)])
+    reader._ocr_tiered(image(), psm, 2)
+    assert calls == [0]
+
+
+def test_short_text_confident(ocr):
+    # under min_words in block mode, kept because above 'confident'
+    calls = ocr([(92, 3)])
+    reader._ocr_tiered(image(), PSM_BLOCK, 2)
+    assert calls == [0]
+
+
+def test_short_text_not_confident(ocr):
+    calls = ocr([(75, 3), (75, 3), (75, 3)])
+    reader._ocr_tiered(image(), PSM_BLOCK, 2)
+    assert calls == [0, 1, 2]
+
+
+def test_max_tier(ocr):
+    calls = ocr([(40, 100), (40, 100), (40, 100)])
+    reader._ocr_tiered(image(), PSM_BLOCK, 0)
+    assert calls == [0]
+
+
+def test_no_upscale_of_wide_images(ocr):
+    calls = ocr([(40, 100), (40, 100), (40, 100)])
+    reader._ocr_tiered(image(reader.OCR_TIERS['upscale_width']), PSM_BLOCK, 2)
+    assert calls == [0, 1]
+
+
+def test_best_result_keeps_the_text(ocr):
+    # binarization losing most of the page does not win on confidence
+    ocr([(68, 150), (72, 20), (65, 30)])
+    assert reader._ocr_tiered(image(), PSM_BLOCK, 2) == 'tier0'
+
+
+def test_stats_file(ocr):
+    ocr([(40, 100), (80, 120)])
+    reader._ocr_tiered(image(), PSM_BLOCK, 2)
+    with open(reader.OCR_TIERS['stats_file']) as f:
+        record = json.loads(f.readline())
+    assert record['kept'] == 1
+    assert [t['tier'] for t in record['tiers']] == [0, 1]